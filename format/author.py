@@ -2,7 +2,10 @@
 Functions for working with author names.
 """
 
-import re
+from functools import lru_cache
+
+# Maximum number of formatted given and family names to cache
+_maxCacheSize = 8192
 
 def formatName(givenName, familyName, abbreviate = False, familyNameFirst = False):
     """
@@ -29,8 +32,7 @@ def formatGivenName(name, abbreviate = False):
     :param abbreviate: True to abbreviate the name. False otherwise
     :returns: Formatted version of the name
     """
-    capitalizedName = re.sub('\s+', ' ', _capitalizeName(name, False).replace('.', '. ')).strip()
-    return capitalizedName if not abbreviate else _abbreviateName(capitalizedName)
+    return _formatGivenName(name, abbreviate)
 
 def formatFamilyName(name):
     """
@@ -39,7 +41,7 @@ def formatFamilyName(name):
     :param name: Name to format
     :returns: Formatted version of the name
     """
-    return _capitalizeName(name, True)
+    return _formatFamilyName(name)
 
 def splitName(name):
     """
@@ -51,6 +53,28 @@ def splitName(name):
     givenName, familyName = _splitNameIntoParts(name)
     return {'givenName': givenName, 'familyName': familyName}
 
+@lru_cache(maxsize = _maxCacheSize)
+def _formatGivenName(name, abbreviate):
+    """
+    Format the given (first) name of a person. Results are cached since the same authors appear in many references.
+    
+    :param name: Name to format
+    :param abbreviate: True to abbreviate the name. False otherwise
+    :returns: Formatted version of the name
+    """
+    capitalizedName = ' '.join(_capitalizeName(name, False).replace('.', '. ').split())
+    return capitalizedName if not abbreviate else _abbreviateName(capitalizedName)
+
+@lru_cache(maxsize = _maxCacheSize)
+def _formatFamilyName(name):
+    """
+    Format the family (last) name of a person. Results are cached in the same way as _formatGivenName().
+    
+    :param name: Name to format
+    :returns: Formatted version of the name
+    """
+    return _capitalizeName(name, True)
+
 def _capitalizeName(name, isFamilyName):
     """
     Format the name of a person.
@@ -59,11 +83,7 @@ def _capitalizeName(name, isFamilyName):
     :param isFamilyName: True if name is a family name. False otherwise
     :returns: Formatted version of the name
     """
-    res = []
-    parts = name.split()
-    for i in parts:
-        res.append(_capitalizeHyphenatedName(i, isFamilyName))
-    return ' '.join(res)
+    return ' '.join(_capitalizeHyphenatedName(i, isFamilyName) for i in name.split())
 
 def _capitalizeHyphenatedName(name, isFamilyName):
     """
@@ -73,16 +93,23 @@ def _capitalizeHyphenatedName(name, isFamilyName):
     :param isFamilyName: True if name is a family name. False otherwise
     :returns: Formatted version of the name
     """
-    res = []
-    parts = name.split('-')
-    for i in parts:
-        if not i.isupper():
-            res.append(i)
-        elif isFamilyName:
-            res.append(_setCapitalization(i))
-        else:
-            res.append(i.title())
-    return '-'.join(res)
+    return '-'.join(_capitalizeNamePart(i, isFamilyName) for i in name.split('-'))
+
+def _capitalizeNamePart(name, isFamilyName):
+    """
+    Format part of a name. Only names that are all uppercase are changed. The input string should already have
+    spaces and hyphens removed.
+    
+    :param name: Name to format
+    :param isFamilyName: True if name is a family name. False otherwise
+    :returns: Formatted version of the name
+    """
+    if not name.isupper():
+        return name
+    elif isFamilyName:
+        return _setCapitalization(name)
+    else:
+        return name.title()
 
 def _setCapitalization(name):
     """
@@ -94,10 +121,10 @@ def _setCapitalization(name):
     res = []
     parts = name.lower().split('\'')
     for i in parts:
-        if i.find('mc') == 0:
-            res.append('Mc' + i.lstrip('mc').title())
-        elif i.find('mac') == 0:
-            res.append('Mac' + i.lstrip('mac').title())
+        if i.startswith('mc'):
+            res.append('Mc' + i[2:].title())
+        elif i.startswith('mac'):
+            res.append('Mac' + i[3:].title())
         else:
             res.append(i.title())
     return '\''.join(res)
@@ -109,11 +136,7 @@ def _abbreviateName(name):
     :param name: Name to abbreviate
     :returns: Abbreviated form of the name
     """
-    res = []
-    parts = name.split()
-    for i in parts:
-        res.append(_abbreviateHyphenatedName(i))
-    return ' '.join(res)
+    return ' '.join(_abbreviateHyphenatedName(i) for i in name.split())
 
 def _abbreviateHyphenatedName(name):
     """
@@ -122,11 +145,7 @@ def _abbreviateHyphenatedName(name):
     :param name: Name to abbreviate
     :returns: Abbreviated form of the name
     """
-    res = []
-    parts = name.split('-')
-    for i in parts:
-        res.append(_abbreviateAbbreviatedName(i))
-    return '-'.join(res)
+    return '-'.join(_abbreviateAbbreviatedName(i) for i in name.split('-'))
 
 def _abbreviateAbbreviatedName(name):
     """
@@ -136,14 +155,7 @@ def _abbreviateAbbreviatedName(name):
     :param name: Name to abbreviate
     :returns: Abbreviated form of the name
     """
-    res = []
-    parts = name.split('.')
-    for i in parts:
-        try:
-            res.append(i[0] + '.')
-        except Exception:
-            pass
-    return ' '.join(res)
+    return ' '.join(i[0] + '.' for i in name.split('.') if i)
 
 def _splitNameAtComma(name):
     """
@@ -152,7 +164,7 @@ def _splitNameAtComma(name):
     :param name: Name to split at comma
     :returns: List of parts of the name
     """
-    return filter(len, [ i.strip() for i in name.split(',', 1) ])
+    return [ i for i in (j.strip() for j in name.split(',', 1)) if i ]
 
 def _splitNameIntoParts(name):
     """
@@ -5,18 +5,50 @@ Functions for working with journal names.
 import re
 import pickle
 import os.path
+from functools import lru_cache
+from operator  import itemgetter
+
+# Directory with the abbreviation dictionaries. These are stored as binary pickles, which load much faster than
+# text pickles.
+_abbrDir = os.path.abspath(os.path.join(os.path.dirname(__file__), 'abbr'))
+
+def _loadAbbreviations(fileName):
+    """
+    Load a dictionary of abbreviations from the abbreviation directory.
+    
+    :param fileName: Name of the file in the abbreviation directory to load
+    :returns: Dictionary stored in the file
+    """
+    with open(os.path.join(_abbrDir, fileName), 'rb') as f:
+        return pickle.load(f)
 
 # Variables to hold abbreviations
-_abbrDir      = os.path.abspath(os.path.join(os.path.dirname(__file__), 'abbr'))
-_journals     = pickle.load(open(os.path.join(_abbrDir, 'journals.p')))
-_infixes      = pickle.load(open(os.path.join(_abbrDir, 'infixes.p')))
-_prefixes     = pickle.load(open(os.path.join(_abbrDir, 'prefixes.p')))
-_suffixes     = pickle.load(open(os.path.join(_abbrDir, 'suffixes.p')))
-_replacements = pickle.load(open(os.path.join(_abbrDir, 'replacements.p')))
+_journals     = _loadAbbreviations('journals.p')
+_infixes      = _loadAbbreviations('infixes.p')
+_prefixes     = _loadAbbreviations('prefixes.p')
+_suffixes     = _loadAbbreviations('suffixes.p')
+_replacements = _loadAbbreviations('replacements.p')
+
+# Regular expression to find all non alphanumeric characters
+_nonWordRegex = re.compile(r'\W', re.ASCII)
+
+# Maximum number of abbreviations to cache for each of journal names and single words
+_maxCacheSize = 4096
 
 def getAbbreviation(name):
     """
-    Generate the abbreviated form of a journal name.
+    Generate the abbreviated form of a journal name. Results are cached, so formatting many references from the same
+    journal only generates its abbreviation once and callers do not need to cache it themselves.
+    
+    :param name: Full name of the journal to abbreviate
+    :returns: Abbreviated form of the journal name
+    """
+    return _generateAbbreviation(name)
+
+@lru_cache(maxsize = _maxCacheSize)
+def _generateAbbreviation(name):
+    """
+    Generate the abbreviated form of a journal name. Results are cached.
     
     :param name: Full name of the journal to abbreviate
     :returns: Abbreviated form of the journal name
@@ -26,8 +58,8 @@ def getAbbreviation(name):
     except Exception:
         res = []
         parts = name.split(':')
-        for i in parts:
-            res.append(_abbreviateSubtitle(i, i is parts[0]))
+        for index, i in enumerate(parts):
+            res.append(_abbreviateSubtitle(i, index == 0))
         return ': '.join(res)
 
 def _getJournalAbbreviation(name):
@@ -38,10 +70,7 @@ def _getJournalAbbreviation(name):
     :raises: ValueError if name is not in the abbreviated journal dictionary
     :returns: Abbreviated form of name
     """
-    try:
-        return _journals[re.sub('[\W]', '', name.lower())]
-    except Exception:
-        raise
+    return _journals[_nonWordRegex.sub('', name.lower())]
 
 def _abbreviateSubtitle(name, checkForJournal):
     """
@@ -72,33 +101,39 @@ def _abbreviateParts(name, forcePrintFirst):
     """
     res = []
     parts = name.split()
-    for i in parts:
-        try:
-            res.append(_abbreviateWord(i).title())
-        except Exception,e:
-            if i is parts[-1] or (forcePrintFirst and i is parts[0]):
-                res.append(i.title())
+    last = len(parts) - 1
+    for index, i in enumerate(parts):
+        abbreviation = _abbreviateWord(i)
+        if abbreviation is not None:
+            res.append(abbreviation.title())
+        elif index == last or (forcePrintFirst and index == 0):
+            res.append(i.title())
     return ' '.join(res)
 
 def _abbreviateWord(name):
     """
-    Abbreviate a single word.
+    Abbreviate a single word. Most words in a journal name do not have an abbreviation, so this returns None rather
+    than raising an exception for them.
     
     :param name: Word to abbreviate
-    :raises: KeyError if an abbreviation is not available
-    :returns: Abbreviated form of name
+    :returns: Abbreviated form of name or None if an abbreviation is not available
+    """
+    return _generateWordAbbreviation(name)
+
+@lru_cache(maxsize = _maxCacheSize)
+def _generateWordAbbreviation(name):
+    """
+    Abbreviate a single word. Results are cached, including None for words that do not have an abbreviation.
+    
+    :param name: Word to abbreviate
+    :returns: Abbreviated form of name or None if an abbreviation is not available
     """
     lowercaseName = name.lower()
-    res = _getFullReplacement(lowercaseName)
-    if res is None:
-        res = _getPrefixReplacement(lowercaseName)
-    if res is None:
-        res = _getSuffixReplacement(lowercaseName)
-    if res is None:
-        res = _getInfixReplacement(lowercaseName)
-    if res is None:
-        raise KeyError('Abbreviation not available')
-    return res if res.rstrip('.').lower() != lowercaseName else name
+    for getReplacement in _replacementFunctions:
+        res = getReplacement(lowercaseName)
+        if res is not None:
+            return res if res.rstrip('.').lower() != lowercaseName else name
+    return None
 
 def _getFullReplacement(name):
     """
@@ -116,12 +151,11 @@ def _getPrefixReplacement(name):
     :param name: Lowercase copy of the name to replace
     :returns: Abbreviation for name or None if not found
     """
-    for i in range(len(name), -1, -1):
-        try:
-            replacement = _prefixes[name[:i]]
-            return replacement
-        except Exception:
-            pass
+    for length, prefixes in _prefixesByLength:
+        if length <= len(name):
+            replacement = prefixes.get(name[:length])
+            if replacement is not None:
+                return replacement
     return None
 
 def _getSuffixReplacement(name):
@@ -131,12 +165,12 @@ def _getSuffixReplacement(name):
     :param name: Lowercase copy of the name to replace
     :returns: Abbreviation for name or None if not found
     """
-    for i in range(0, len(name) + 1):
-        try:
-            replacement = _suffixes[name[i:len(name)]]
-            return name[:i] + replacement
-        except Exception:
-            pass
+    for length, suffixes in _suffixesByLength:
+        if length <= len(name):
+            i = len(name) - length
+            replacement = suffixes.get(name[i:])
+            if replacement is not None:
+                return name[:i] + replacement
     return None
 
 def _getInfixReplacement(name):
@@ -146,12 +180,29 @@ def _getInfixReplacement(name):
     :param name: Lowercase copy of the name to replace
     :returns: Abbreviation for name or None if not found
     """
-    for i in range(len(name), -1, -1):
-        end = len(name) - i
-        for j in range(0, end + 1):
-            try:
-                replacement = _infixes[name[j:i+j]]
+    for length, infixes in _infixesByLength:
+        for j in range(0, len(name) - length + 1):
+            replacement = infixes.get(name[j:j+length])
+            if replacement is not None:
                 return name[:j] + replacement
-            except Exception:
-                pass
     return None
+
+def _groupByLength(values):
+    """
+    Group the entries of a dictionary by the length of their keys.
+    
+    :param values: Dictionary to group
+    :returns: List of (length, dictionary) tuples ordered from the longest to the shortest keys
+    """
+    res = {}
+    for key, value in values.items():
+        res.setdefault(len(key), {})[key] = value
+    return sorted(res.items(), key = itemgetter(0), reverse = True)
+
+# Prefix, suffix, and infix abbreviations grouped by length so that only lengths that exist are checked, longest first
+_prefixesByLength = _groupByLength(_prefixes)
+_suffixesByLength = _groupByLength(_suffixes)
+_infixesByLength  = _groupByLength(_infixes)
+
+# Functions used to find the abbreviation of a word, in the order that they are tried
+_replacementFunctions = (_getFullReplacement, _getPrefixReplacement, _getSuffixReplacement, _getInfixReplacement)
@@ -2,12 +2,28 @@
 Functions for working with the arXiv.org api.
 """
 
-import urllib
 import requests
-from xml.etree       import ElementTree
-from refkit.util     import arxivid
-from refkit.metadata import Metadata
-from refkit.format   import author
+from requests.adapters import HTTPAdapter
+from xml.etree         import ElementTree
+from refkit.util       import arxivid
+from refkit.util       import cache
+from refkit.util       import parallel
+from refkit.metadata   import Metadata
+from refkit.metadata   import Name
+from refkit.format     import author
+
+# Session used for all requests to arXiv.org so that connections are reused between lookups
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections = 10, pool_maxsize = 20, max_retries = 3))
+
+# Number of seconds to wait for a response from arXiv.org
+_timeout = 10
+
+# Default maximum number of lookups to run at the same time in searchMany
+defMaxWorkers = 8
+
+# Namespaces used in the results of arXiv api queries
+_namespaces = {'atom': 'http://www.w3.org/2005/Atom', 'arxiv': 'http://arxiv.org/schemas/atom'}
 
 def search(lookup):
     """
@@ -25,30 +41,47 @@ def search(lookup):
     except Exception:
         raise ValueError('Could not match query to arXiv')
 
+def searchMany(lookups, maxWorkers = defMaxWorkers):
+    """
+    Search for several references on arXiv.org at the same time. Each lookup is run through search() on a pool of
+    threads, so the time spent waiting on arXiv.org overlaps between lookups.
+    
+    :param lookups: List of strings with the lookups to search for on arXiv.org
+    :param maxWorkers: Maximum number of lookups to run at the same time
+    :returns: List with a Metadata object for each lookup, in the same order as lookups, or None for each lookup that
+              could not be found on arXiv.org
+    """
+    return parallel.run(search, lookups, maxWorkers)
+
 def _getMetadataFromArxivId(id):
     """
-    Get metadata from arXiv.org given an arXiv identifier.
+    Get metadata from arXiv.org given an arXiv identifier. Responses are cached on disk so that each identifier is
+    only requested from arXiv.org once.
     
     :param id: arXiv identifier to look up
-    :returns: Result from arXiv api query
+    :returns: Content of the response to the arXiv api query
     """
+    try:
+        return cache.load('arxiv', id)
+    except KeyError:
+        pass
     url = 'http://export.arxiv.org/api/query?id_list=' + id + '&start=0&max_results=2'
-    return requests.get(url)
+    response = _session.get(url, timeout = _timeout)
+    response.raise_for_status()
+    cache.save('arxiv', id, response.content)
+    return response.content
 
 def _saveMetadata(data):
     """
     Convert the results of an arXiv api call to a Metadata object.
     
-    :param data: Results of the arXiv api call
+    :param data: Content of the response to the arXiv api call
     :raises: ValueError if the metadata could not be saved
     :returns: Metadata object with the content of data
     """
-    try:
-        root = ElementTree.fromstring(data.content)
-        entry = _getEntry(root)
-        return _saveMetadataFromEntry(entry)
-    except Exception:
-        raise
+    root = ElementTree.fromstring(data)
+    entry = _getEntry(root)
+    return _saveMetadataFromEntry(entry)
 
 def _getEntry(root):
     """
@@ -59,13 +92,10 @@ def _getEntry(root):
     :raises: ValueError is the entry cannot be extracted from the XML data
     :returns: Node that contains the results from the query
     """
-    entry = None
-    for i in root:
-        if i.tag.endswith('entry'):
-            if entry is not None:
-                raise ValueError('Multiple entries in result')
-            entry = i
-    return entry
+    entries = root.findall('atom:entry', _namespaces)
+    if len(entries) > 1:
+        raise ValueError('Multiple entries in result')
+    return entries[0] if len(entries) > 0 else None
 
 def _saveMetadataFromEntry(entry):
     """
@@ -76,9 +106,9 @@ def _saveMetadataFromEntry(entry):
     """
     metadata = Metadata()
     metadata.publisher = 'arXiv.org'
-    _saveValue(metadata, 'title', entry, 'title')
-    _saveValue(metadata, 'url',   entry, 'id')
-    _saveValue(metadata, 'doi',   entry, 'doi')
+    _saveValue(metadata, 'title', entry, 'atom:title')
+    _saveValue(metadata, 'url',   entry, 'atom:id')
+    _saveValue(metadata, 'doi',   entry, 'arxiv:doi')
     _saveYear(metadata, entry)
     _saveAuthors(metadata, entry)
     metadata.tidy()
@@ -93,15 +123,14 @@ def _saveValue(metadata, attribute, entry, tag):
     :param metadata: Metadata object to save the value in
     :param attribute: Name of the attribute to save the value as in metadata
     :param entry: XML entry with the value to save
-    :param tag: Tag of the value in entry to save
-    """
-    for i in entry:
-        if i.tag.endswith(tag):
-            try:
-                setattr(metadata, attribute, i.text)
-            except Exception,e:
-                pass
-            break
+    :param tag: Namespace-qualified tag of the value in entry to save
+    """
+    node = entry.find(tag, _namespaces)
+    if node is not None:
+        try:
+            setattr(metadata, attribute, node.text)
+        except Exception as e:
+            pass
 
 def _saveYear(metadata, entry):
     """
@@ -111,13 +140,12 @@ def _saveYear(metadata, entry):
     :param metadata: Metadata object to save the year in
     :param entry: XML entry with the value to save
     """
-    for i in entry:
-        if i.tag.endswith('updated'):
-            try:
-                setattr(metadata, 'year', i.text.split('-')[0])
-            except Exception:
-                pass
-            break
+    node = entry.find('atom:updated', _namespaces)
+    if node is not None:
+        try:
+            setattr(metadata, 'year', node.text.split('-')[0])
+        except Exception:
+            pass
 
 def _saveAuthors(metadata, entry):
     """
@@ -126,12 +154,11 @@ def _saveAuthors(metadata, entry):
     :param metadata: Metadata object to save the authors in
     :param entry: XML entry with the authors to save
     """
-    for i in entry:
-        if i.tag.endswith('author'):
-            try:
-                metadata.author.append(_getName(i))
-            except Exception:
-                pass
+    for i in entry.findall('atom:author', _namespaces):
+        try:
+            metadata.author.append(_getName(i))
+        except Exception:
+            pass
 
 def _getName(entry):
     """
@@ -139,11 +166,10 @@ def _getName(entry):
     
     :param entry: XML entry with the name to save
     :raises: ValueError if a name cannot be found
-    :returns: Dictionary with the given and family name in the entry
-    """
-    for i in entry:
-        if i.tag.endswith('name'):
-            try:
-                return author.splitName(i.text)
-            except Exception:
-                raise
+    :returns: Name with the given and family name in the entry
+    """
+    node = entry.find('atom:name', _namespaces)
+    if node is None:
+        raise ValueError('Name not found in entry')
+    name = author.splitName(node.text)
+    return Name(name['givenName'], name['familyName'])
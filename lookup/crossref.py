@@ -4,14 +4,25 @@ Functions for working with the CrossRef.org rest api.
 
 import re
 import sys
-import urllib
+import heapq
 import requests
 import unicodedata
-from operator        import itemgetter
-from refkit.util     import doi
-from refkit.util     import isbn
-from refkit.util     import citation
-from refkit.metadata import Metadata
+from requests.adapters import HTTPAdapter
+from operator          import itemgetter
+from refkit.util       import doi
+from refkit.util       import cache
+from refkit.util       import isbn
+from refkit.util       import citation
+from refkit.util       import parallel
+from refkit.metadata   import Metadata
+from refkit.metadata   import Name
+
+# Session used for all requests to CrossRef.org so that connections are reused between lookups
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections = 10, pool_maxsize = 20, max_retries = 3))
+
+# Number of seconds to wait for a response from CrossRef.org
+_timeout = 10
 
 # Default minimum value for overlap score to be valid without user intervention
 defAutoSaveMinimum = 0.99
@@ -19,6 +30,9 @@ defAutoSaveMinimum = 0.99
 # Default maximum ratio of the second best to best overlaps for a result to be valid without user intervention
 defAutoSaveMaximum = 0.7
 
+# Default maximum number of lookups to run at the same time in searchMany
+defMaxWorkers = 8
+
 def search(lookup, autoSaveMinimum = defAutoSaveMinimum, autoSaveMaximum = defAutoSaveMaximum):
     """
     Search for a reference on CrossRef.org given a lookup string. This function goes through the following steps in
@@ -43,30 +57,75 @@ def search(lookup, autoSaveMinimum = defAutoSaveMinimum, autoSaveMaximum = defAu
     :returns: Metadata object with information about the reference that was identified
     """
     try:
+        lookup = unicodedata.normalize('NFKD', lookup).encode('ascii', 'ignore').decode('ascii')
+    except:
+        pass
+    lookupDoi = _getDoi(lookup, autoSaveMinimum, autoSaveMaximum)
+    crossRefData = _getMetadataFromDoi(lookupDoi)
+    return _saveMetadata(crossRefData)
+
+def searchDoi(lookup):
+    """
+    Search for a reference on CrossRef.org given a string that contains its DOI. Unlike search(), this never falls
+    back on the CrossRef.org search api, so it never prompts the user.
+    
+    :param lookup: String with the DOI of the reference to search for. The DOI does not need to be formatted
+    :raises ValueError: If lookup does not contain a DOI or the DOI could not be found on CrossRef.org
+    :returns: Metadata object with information about the reference with that DOI
+    """
+    crossRefData = _getMetadataFromDoi(lookup)
+    return _saveMetadata(crossRefData)
+
+def searchMany(lookups, autoSaveMinimum = defAutoSaveMinimum, autoSaveMaximum = defAutoSaveMaximum, \
+               maxWorkers = defMaxWorkers):
+    """
+    Search for several references on CrossRef.org. Lookups that contain a DOI are run through searchDoi() on a pool of
+    threads, so the time spent waiting on CrossRef.org overlaps between them. All other lookups may need to prompt the
+    user to pick a result, so they are run through search() one at a time on the calling thread once the DOI lookups
+    are done.
+    
+    :param lookups: List of strings with the lookups to search for on CrossRef.org
+    :param autoSaveMinimum: Minimum value for overlap score to be valid without user intervention (0 - 1)
+    :param autoSaveMaximum: Maximum ratio of the second best to best overlaps for a result to be valid without
+                            user intervention (0 - 1)
+    :param maxWorkers: Maximum number of lookups to run at the same time
+    :returns: List with a Metadata object for each lookup, in the same order as lookups, or None for each lookup that
+              could not be found on CrossRef.org
+    """
+    lookups = list(lookups)
+    lookupDois = doi.extractMany(lookups)
+    found = iter(parallel.run(searchDoi, [ i for i in lookupDois if i is not None ], maxWorkers))
+    res = []
+    for lookup, lookupDoi in zip(lookups, lookupDois):
+        if lookupDoi is not None:
+            res.append(next(found))
+            continue
         try:
-            lookup = unicodedata.normalize('NFKD', lookup).encode('ascii', 'ignore')
-        except:
-            pass
-        lookupDoi = _getDoi(lookup, autoSaveMinimum, autoSaveMaximum)
-        crossRefData = _getMetadataFromDoi(lookupDoi)
-        return _saveMetadata(crossRefData)
-    except Exception, e:
-        raise
+            res.append(search(lookup, autoSaveMinimum, autoSaveMaximum))
+        except Exception:
+            res.append(None)
+    return res
 
 def _getMetadataFromDoi(lookupDoi):
     """
-    Lookup a citation by DOI. The DOI does not need to be formatted.
+    Lookup a citation by DOI. The DOI does not need to be formatted. Responses are cached on disk so that each DOI is
+    only requested from CrossRef.org once.
 
     :param lookupDoi: String with the DOI to search for
     :raises ValueError: If the DOI could not be found on CrossRef.org
     :returns: Dictionary with information that was obtained from CrossRef.org for the citation with the set DOI
     """
+    rawDoi = doi.extract(lookupDoi)
     try:
-        rawDoi = doi.extract(lookupDoi)
-        url = 'http://api.crossref.org/works/' + rawDoi
-        return requests.get(url).json()
-    except Exception:
-        raise
+        return cache.load('crossref', rawDoi)
+    except KeyError:
+        pass
+    url = 'http://api.crossref.org/works/' + rawDoi
+    response = _session.get(url, timeout = _timeout)
+    response.raise_for_status()
+    res = response.json()
+    cache.save('crossref', rawDoi, res)
+    return res
 
 def _getDoi(lookup, autoSaveMinimum, autoSaveMaximum):
     """
@@ -84,11 +143,7 @@ def _getDoi(lookup, autoSaveMinimum, autoSaveMaximum):
         return resDoi
     except Exception:
         pass
-    try:
-        resDoi = _getDoiForCitation(lookup, autoSaveMinimum, autoSaveMaximum)
-        return resDoi
-    except Exception, e:
-        raise
+    return _getDoiForCitation(lookup, autoSaveMinimum, autoSaveMaximum)
 
 def _getDoiForCitation(lookup, autoSaveMinimum, autoSaveMaximum):
     """
@@ -101,15 +156,12 @@ def _getDoiForCitation(lookup, autoSaveMinimum, autoSaveMaximum):
     :raises ValueError: If a DOI could not be obtained for the lookup string
     :returns: DOI for the lookup string
     """
+    queryResults = _runQuery(lookup)
     try:
-        queryResults = _runQuery(lookup)
-        try:
-            bestResult = _getBestQueryResult(lookup, queryResults, autoSaveMinimum, autoSaveMaximum)
-            return doi.extract(bestResult['doi'])
-        except Exception, e:
-            raise ValueError('Could not match citation to DOI')
-    except Exception:
-        raise
+        bestResult = _getBestQueryResult(lookup, queryResults, autoSaveMinimum, autoSaveMaximum)
+        return doi.extract(bestResult['doi'])
+    except Exception as e:
+        raise ValueError('Could not match citation to DOI')
 
 def _runQuery(value):
     """
@@ -118,13 +170,8 @@ def _runQuery(value):
     :param value: String with the citation to search for
     :returns: Dictionary with the results of the query
     """
-    try:
-        lowercaseCitation = value.lower()
-        formattedCitation = urllib.quote_plus(lowercaseCitation)
-        url = 'http://search.crossref.org/dois?q=' + formattedCitation + '&sort=score&page=1&rows=10&header=true'
-        return requests.get(url).json()
-    except Exception:
-        raise
+    params = [('q', value.lower()), ('sort', 'score'), ('page', 1), ('rows', 10), ('header', 'true')]
+    return _session.get('http://search.crossref.org/dois', params = params, timeout = _timeout).json()
 
 def _getBestQueryResult(lookup, queryResults, autoSaveMinimum, autoSaveMaximum):
     """
@@ -138,7 +185,8 @@ def _getBestQueryResult(lookup, queryResults, autoSaveMinimum, autoSaveMaximum):
     :returns: Best match that was found or None if a viable match was not found
     """
     results = [ (citation.overlap(lookup, i['fullCitation']), i) for i in queryResults ]
-    results = sorted(results, key = itemgetter(0), reverse = True)
+    # Only the two best results are needed to decide whether the best one can be saved without asking the user
+    results = heapq.nlargest(2, results, key = itemgetter(0))
     if len(results) == 1 and results[0][0] >= autoSaveMinimum:
         return results[0][1]
     if len(results) > 1:
@@ -171,15 +219,15 @@ def _promptForBestResult(lookup, queryResults):
     :param queryResults: Json list with the query results to analyze
     :returns: Value entered by the user
     """
-    print ''
-    print 'LOOKUP STRING: ' + lookup
-    print 'QUERY RESULTS:'
+    print('')
+    print('LOOKUP STRING: ' + lookup)
+    print('QUERY RESULTS:')
     for i in range(len(queryResults)):
-        print '[' + str(i + 1) + '] ' + queryResults[i]['fullCitation']
+        print('[' + str(i + 1) + '] ' + queryResults[i]['fullCitation'])
     try:
-        return raw_input('ENTER NUMBER OF CORRECT RESULT (or 0 if no match): ')
+        return input('ENTER NUMBER OF CORRECT RESULT (or 0 if no match): ')
     except KeyboardInterrupt:
-        print ''
+        print('')
         sys.exit(1)
 
 def _askForManualEntry(lookup):
@@ -327,18 +375,17 @@ def _saveNames(metadata, crossRefData, dictionaryKey, attributeName):
     """
     try:
         names = crossRefData[dictionaryKey]
-        setattr(metadata, attributeName, filter(len, [ _saveName(i) for i in names ]))
+        setattr(metadata, attributeName, [ i for i in (_saveName(j) for j in names) if i is not None ])
     except Exception:
         pass
 
 def _saveName(name):
     """
-    Put a name into a dictionary.
+    Convert a name from CrossRef.org to a Name.
     
-    :param name: Name to put into dictionary
-    :returns: Dictionary with givenName and familyName
+    :param name: Dictionary with the name returned from CrossRef.org
+    :returns: Name with givenName and familyName or None if either is missing
     """
-    try:
-        return {'givenName': name['given'], 'familyName': name['family']}
-    except Exception:
-        return {}
+    if 'given' in name and 'family' in name:
+        return Name(name['given'], name['family'])
+    return None
@@ -2,16 +2,38 @@
 This file defines that general storage object for a reference.
 """
 
-import re
+from functools     import lru_cache
+from collections   import namedtuple
 from refkit.format import author
 from refkit.format import journal
 from refkit.util   import arxivid
 
+# Local reference to the function used to format each author and editor name
+_formatName = author.formatName
+
+# Given (first) and family (last) name of an author or editor
+Name = namedtuple('Name', ['givenName', 'familyName'])
+
 class Metadata(object):
     """
     Class to store information about a reference.
     """
     
+    # Names of the fields that store a single string
+    _stringFields = ('doi', 'isbn', 'issn', 'url', 'publisher', 'title', 'edition', 'journal', 'volume', 'issue', \
+                     'year', 'pageStart', 'pageEnd')
+    
+    # Names of the fields that store a list of names
+    _nameFields = ('author', 'editor')
+    
+    # Only the fields above and the caches of formatted names and pages can be set, which keeps each object small and
+    # makes attribute access faster
+    __slots__ = _stringFields + _nameFields + ('_formattedNames', '_formattedPages')
+    
+    # Pairs of a string to find in the publisher name, with spaces removed and in lowercase, and the name of the
+    # method to fill in additional fields for references from that publisher
+    _publisherHandlers = (('americanphysicalsociety', '_tidyForAps'), ('naturepublishing', '_tidyForNature'))
+    
     def __init__(self, asDictionary = None):
         """
         Default constructor.
@@ -22,8 +44,8 @@ class Metadata(object):
             self.isbn      = asDictionary.get('isbn',      self.isbn)
             self.issn      = asDictionary.get('issn',      self.issn)
             self.url       = asDictionary.get('url',       self.url)
-            self.author    = asDictionary.get('author',    self.author)
-            self.editor    = asDictionary.get('editor',    self.editor)
+            self.author    = [ _toName(i) for i in asDictionary.get('author', self.author) ]
+            self.editor    = [ _toName(i) for i in asDictionary.get('editor', self.editor) ]
             self.publisher = asDictionary.get('publisher', self.publisher)
             self.title     = asDictionary.get('title',     self.title)
             self.edition   = asDictionary.get('edition',   self.edition)
@@ -53,26 +75,29 @@ class Metadata(object):
         self.year      = ''
         self.pageStart = ''
         self.pageEnd   = ''
+        self._formattedNames = None
+        self._formattedPages = None
     
-    def getDataFromUser(self):
+    def getDataFromUser(self, lookupDoi = None):
         """
-        Set the content of this object based on information from the user.
+        Set the content of this object based on information from the user. If the user enters a DOI that can be
+        looked up, the rest of the information is taken from the lookup and the user is not asked for it.
+        
+        :param lookupDoi: Function that returns a Metadata object for a DOI, or raises an error if it cannot be found.
+                          None to always ask the user for every field
+        :returns: Self object
         """
         self.getValueFromUser('doi')
-        self.getValueFromUser('isbn')
-        self.getValueFromUser('issn')
-        self.getValueFromUser('url')
-        self.getValueFromUser('publisher')
-        self.getValueFromUser('title')
-        self.getValueFromUser('edition')
-        self.getValueFromUser('journal')
-        self.getValueFromUser('volume')
-        self.getValueFromUser('issue')
-        self.getValueFromUser('year')
-        self.getValueFromUser('pageStart')
-        self.getValueFromUser('pageEnd')
-        self.getPeopleFromUser('author')
-        self.getPeopleFromUser('editor')
+        if self.doi and lookupDoi is not None:
+            try:
+                self._copyFrom(lookupDoi(self.doi))
+                return self
+            except Exception:
+                pass
+        for i in Metadata._stringFields[1:]:
+            self.getValueFromUser(i)
+        for i in Metadata._nameFields:
+            self.getPeopleFromUser(i)
         return self
     
     def getValueFromUser(self, field):
@@ -81,7 +106,7 @@ class Metadata(object):
         
         :param field: Name of the field to get from the user.
         """
-        setattr(self, field, raw_input(field + ': '))
+        setattr(self, field, input(field + ': '))
     
     def getPeopleFromUser(self, field):
         """
@@ -103,21 +128,33 @@ class Metadata(object):
         Prompt the user for a name.
         
         :param field: Name of the field to save the name in.
-        :returns: Dictionary with givenName and familyName or None if no value was entered.
+        :returns: Name with givenName and familyName or None if no value was entered.
+        """
+        givenName = input(field + ' given name: ')
+        familyName = input(field + ' family name: ')
+        return Name(givenName, familyName) if familyName else None
+    
+    def _copyFrom(self, other):
+        """
+        Set the content of this object to the content of another Metadata object.
+        
+        :param other: Metadata object to copy the content of
         """
-        res = {}
-        res['givenName'] = raw_input(field + ' given name: ')
-        res['familyName'] = raw_input(field + ' family name: ')
-        return res if len(res['familyName']) != 0 else None
+        for i in Metadata.__slots__:
+            setattr(self, i, getattr(other, i))
     
     def tidy(self):
         """
-        Tidy values in self object by removing newlines and extra whitespace.
+        Tidy values in self object by removing newlines and extra whitespace. This also starts caching formatted
+        names and pages.
         """
-        attributes = vars(self).keys()
-        for i in attributes:
-            setattr(self, i, self._tidyValue(getattr(self, i)))
+        for i in Metadata._stringFields:
+            setattr(self, i, self._tidyObject(getattr(self, i)))
+        for i in Metadata._nameFields:
+            setattr(self, i, [ self._tidyName(j) for j in getattr(self, i) ])
         self._tidyByPublisher()
+        self._formattedNames = {}
+        self._formattedPages = {}
     
     def toReferenceString(self, maxAuthors = 0, abbreviateJournal = True, abbreviateNames = True, \
                           familyNameFirst = False, forceTitle = False, firstPageOnly = False):
@@ -132,7 +169,7 @@ class Metadata(object):
         :param firstPageOnly: True to show only the first page when a range is available. False otherwise
         :returns: String with the reference information
         """
-        if len(self.journal) > 0:
+        if self.journal:
             return self._journalToString(maxAuthors, abbreviateJournal, abbreviateNames, familyNameFirst, \
                                          forceTitle, firstPageOnly)
         else:
@@ -149,59 +186,16 @@ class Metadata(object):
         
         :returns: String with all of the information in this object
         """
-        res = []
-        self._addValueToList(res, 'doi')
-        self._addValueToList(res, 'isbn')
-        self._addValueToList(res, 'issn')
-        self._addValueToList(res, 'url')
-        self._addValueToList(res, 'publisher')
-        self._addValueToList(res, 'title')
-        self._addValueToList(res, 'edition')
-        self._addValueToList(res, 'journal')
-        self._addValueToList(res, 'volume')
-        self._addValueToList(res, 'issue')
-        self._addValueToList(res, 'year')
-        self._addNamesToList(res, 'author')
-        self._addNamesToList(res, 'editor')
-        self._addPagesToList(res)
+        values = (self.doi, self.isbn, self.issn, self.url, self.publisher, self.title, self.edition, self.journal, \
+                  self.volume, self.issue, self.year)
+        res  = [ i for i in values if i ]
+        res += [ i.givenName + ' ' + i.familyName for i in self.author ]
+        res += [ i.givenName + ' ' + i.familyName for i in self.editor ]
+        pages = self._getPagesAsString(False)
+        if pages:
+            res.append(pages)
         return ', '.join(res)
     
-    def _tidyValue(self, value):
-        """
-        Fix up to formatting of a value by removing newline characters and extra white space.
-    
-        :param value: String to format
-        :returns: Formatted version of the value
-        """
-        if isinstance(value, (list, tuple)):
-            return self._tidyList(value)
-        elif isinstance(value, dict):
-            return self._tidyDict(value)
-        else:
-            return self._tidyObject(value)
-    
-    def _tidyDict(self, values):
-        """
-        Fix up the values in a dictionary.
-        
-        :param values: Dictionary with the values to format
-        :returns: Dictionary of formatted values
-        """
-        for key, value in values.iteritems():
-            values[key] = self._tidyValue(value)
-        return values
-    
-    def _tidyList(self, values):
-        """
-        Fix up a list of values.
-        
-        :param values: List of values to format
-        :returns: List of formatted values
-        """
-        for i in range(len(values)):
-            values[i] = self._tidyValue(values[i])
-        return values
-    
     def _tidyObject(self, value):
         """
         Format a single object.
@@ -209,26 +203,33 @@ class Metadata(object):
         :param value: Object to format
         :returns: Formatted version of value
         """
-        value = value.replace('\n', ' ')
-        value = re.sub('\s+', ' ', value)
-        value = value.strip()
-        return value
+        return ' '.join(value.split())
+    
+    def _tidyName(self, name):
+        """
+        Format the given and family names of a person.
+        
+        :param name: Name or dictionary with 'givenName' and 'familyName' fields to format
+        :returns: Name with formatted given and family names
+        """
+        name = _toName(name)
+        return Name(self._tidyObject(name.givenName), self._tidyObject(name.familyName))
     
     def _tidyByPublisher(self):
         """
         Try to fill out additional fields in self object based on saved data.
         """
-        lookup = self.publisher.lower().replace(' ', '')
-        if lookup.find('americanphysicalsociety') != -1:
-            self._tidyForAps()
-        elif lookup.find('naturepublishing') != -1:
-            self._tidyForNature()
+        lookup = _canonPublisher(self.publisher)
+        for publisher, handler in Metadata._publisherHandlers:
+            if publisher in lookup:
+                getattr(self, handler)()
+                break
     
     def _tidyForAps(self):
         """
         Try to fill in values based on APS publishing information.
         """
-        if (self.pageStart == '' or self.volume == '') and len(self.doi) > 0:
+        if (self.pageStart == '' or self.volume == '') and self.doi:
             try:
                 parts = self.doi.split('/')[1].split('.')
                 self.volume    = self.volume    if self.volume    != '' else parts[1]
@@ -260,16 +261,16 @@ class Metadata(object):
         :returns: String with the reference information
         """
         res = self._getAuthorsAsString(maxAuthors, abbreviateNames, familyNameFirst)
-        if forceTitle and len(self.title) > 0:
+        if forceTitle and self.title:
             res.append(self.title + ',')
-        if len(self.journal) > 0:
+        if self.journal:
             res.append(journal.getAbbreviation(self.journal) if abbreviateJournal else self.journal)
-        if len(self.volume) > 0:
+        if self.volume:
             res.append(self.volume + ',')
         pages = self._getPagesAsString(firstPageOnly)
-        if len(pages) > 0:
+        if pages:
             res.append(pages)
-        if len(self.year) > 0:
+        if self.year:
             res.append('(' + self.year + ')')
         return ' '.join(res)
     
@@ -286,10 +287,10 @@ class Metadata(object):
         :returns: String with the reference information
         """
         res = self._getAuthorsAsString(maxAuthors, abbreviateNames, familyNameFirst)
-        if forceTitle and len(self.title) > 0:
+        if forceTitle and self.title:
             res.append(self.title + ',')
         res.append('arXiv:' + arxivIdentifier)
-        if len(self.year) > 0:
+        if self.year:
             res.append('(' + self.year + ')')
         return ' '.join(res)
     
@@ -304,17 +305,17 @@ class Metadata(object):
         :returns: String with the reference information
         """
         res = []
-        if len(self.author) > 0:
+        if self.author:
             res += self._getAuthorsAsString(maxAuthors, abbreviateNames, familyNameFirst)
-        elif len(self.editor) > 0:
+        elif self.editor:
             res += self._getEditorsAsString(maxAuthors, abbreviateNames, familyNameFirst)
-        if len(self.title) > 0:
+        if self.title:
             res.append(self.title + ',')
-        if len(self.author) > 0 and len(self.editor) > 0:
+        if self.author and self.editor:
             res += self._getEditorsAsString(maxAuthors, abbreviateNames, familyNameFirst)
-        if len(self.publisher) > 0:
+        if self.publisher:
             res.append(self.publisher)
-        if len(self.year) > 0:
+        if self.year:
             res.append('(' + self.year + ')')
         return ' '.join(res)
     
@@ -327,8 +328,8 @@ class Metadata(object):
         :param familyNameFirst: True to print the last names of authors/editors first. False otherwise
         :returns: String with the formatted list of authors
         """
-        if len(self.author) > 0:
-            return [ Metadata._formatNameString(self.author, maxAuthors, abbreviateNames, familyNameFirst) + ',' ]
+        if self.author:
+            return [ self._getFormattedNames('author', maxAuthors, abbreviateNames, familyNameFirst) + ',' ]
         else:
             return []
     
@@ -341,78 +342,102 @@ class Metadata(object):
         :param familyNameFirst: True to print the last names of authors/editors first. False otherwise
         :returns: String with the formatted list of editors
         """
-        if len(self.editor) > 0:
-            editorString = Metadata._formatNameString(self.editor, maxAuthors, abbreviateNames, familyNameFirst)
+        if self.editor:
+            editorString = self._getFormattedNames('editor', maxAuthors, abbreviateNames, familyNameFirst)
             return [ editorString + ' (Ed.),' if len(self.editor) == 1 else editorString + ' (Eds.),' ]
         else:
             return []
     
-    @staticmethod
-    def _formatNameString(names, maxAuthors, abbreviateNames, familyNameFirst):
+    def _getFormattedNames(self, field, maxAuthors, abbreviateNames, familyNameFirst):
         """
-        Return a list of formatted names.
+        Return the formatted list of names in a field. Once tidy() has been called, results are cached in self object
+        so that formatting the same reference more than once only formats its names once for each set of options.
+        Cached results are keyed on the names themselves, so changing the field afterwards is picked up.
         
-        :param names: List of names to format, each as a dictionary with 'familyName' and 'givenName' fields
+        :param field: Name of the field with the names to format
         :param maxAuthors: Maximum number of authors/editors to print. None to print all authors
         :param abbreviateNames: True to abbreviate the first names of authors/editors. False to keep full names
         :param familyNameFirst: True to print the last names of authors/editors first. False otherwise
         :returns: String with the formatted list of names
         """
-        res = []
-        for i in range(len(names)):
-            if maxAuthors > 1 and i == maxAuthors - 1 and i < len(names) - 1:
-                res.append('et al.')
-                break
-            name = names[i]
-            res.append(author.formatName(name['givenName'], name['familyName'], abbreviateNames, familyNameFirst))
-        return ', '.join(res)
+        if self._formattedNames is None:
+            return Metadata._formatNameString(getattr(self, field), maxAuthors, abbreviateNames, familyNameFirst)
+        names = tuple(_toName(i) for i in getattr(self, field))
+        key = (field, names, maxAuthors, abbreviateNames, familyNameFirst)
+        if key not in self._formattedNames:
+            self._formattedNames[key] = Metadata._formatNameString(names, maxAuthors, abbreviateNames, familyNameFirst)
+        return self._formattedNames[key]
     
-    def _addValueToList(self, values, key):
-        """
-        If the value of the attribute 'key' has some length, then add it to a list.
-        
-        :param values: List of values to add to
-        :param key: Key of the attribute to add
-        """
-        value = getattr(self, key)
-        if len(value) > 0:
-            values.append(value)
-    
-    def _addNamesToList(self, values, key):
+    @staticmethod
+    def _formatNameString(names, maxAuthors, abbreviateNames, familyNameFirst):
         """
-        Add all names stored by self object to a list.
+        Return a list of formatted names.
         
-        :param values: List of values to add to
-        :param key: Key of the attribute with the list of names
+        :param names: List of Name objects to format
+        :param maxAuthors: Maximum number of authors/editors to print. None to print all authors
+        :param abbreviateNames: True to abbreviate the first names of authors/editors. False to keep full names
+        :param familyNameFirst: True to print the last names of authors/editors first. False otherwise
+        :returns: String with the formatted list of names
         """
-        names = getattr(self, key)
-        for i in names:
-            values.append(i['givenName'] + ' ' + i['familyName'])
+        truncate = maxAuthors > 1 and len(names) > maxAuthors
+        res = [ _formatName(i.givenName, i.familyName, abbreviateNames, familyNameFirst) \
+                for i in (names[:maxAuthors - 1] if truncate else names) ]
+        if truncate:
+            res.append('et al.')
+        return ', '.join(res)
     
-    def _addPagesToList(self, values):
+    def _getPagesAsString(self, firstPageOnly):
         """
-        Add pages stored by self object to a list of values.
+        Return pages as a string. Once tidy() has been called, results are cached in self object, keyed on the
+        current first and last pages.
         
-        :param values: List of values to add to
+        :param firstPageOnly: True to show only the first page when a range is available. False otherwise
+        :returns: String with pages in self object
         """
-        pages = self._getPagesAsString(False)
-        if len(pages):
-            values.append(pages)
+        if self._formattedPages is None:
+            return self._formatPages(firstPageOnly)
+        key = (self.pageStart, self.pageEnd, firstPageOnly)
+        if key not in self._formattedPages:
+            self._formattedPages[key] = self._formatPages(firstPageOnly)
+        return self._formattedPages[key]
     
-    def _getPagesAsString(self, firstPageOnly):
+    def _formatPages(self, firstPageOnly):
         """
         Format pages and return then as a string.
         
         :param firstPageOnly: True to show only the first page when a range is available. False otherwise
         :returns: String with pages in self object
         """
-        if firstPageOnly and len(self.pageStart) > 0:
+        if firstPageOnly and self.pageStart:
             return self.pageStart
-        if len(self.pageStart) > 0 and len(self.pageEnd) > 0:
+        if self.pageStart and self.pageEnd:
             return self.pageStart + '-' + self.pageEnd
-        elif len(self.pageStart) > 0:
+        elif self.pageStart:
             return self.pageStart
-        elif len(self.pageEnd) > 0:
+        elif self.pageEnd:
             return self.pageEnd
         else:
             return ''
+
+def _toName(name):
+    """
+    Convert a dictionary with 'givenName' and 'familyName' fields, such as those returned by author.splitName, to a
+    Name. Values that are already a Name are returned unchanged.
+    
+    :param name: Name or dictionary to convert
+    :returns: Name with the given and family names in name
+    """
+    if isinstance(name, Name):
+        return name
+    return Name(name['givenName'], name['familyName'])
+
+@lru_cache(maxsize = 1024)
+def _canonPublisher(publisher):
+    """
+    Convert the name of a publisher to the form used to find its handler, in lowercase with spaces removed. Results
+    are cached since many references share the same publisher.
+    
+    :param publisher: Name of the publisher
+    :returns: Name of the publisher in lowercase with spaces removed
+    """
+    return publisher.lower().replace(' ', '')
@@ -2,12 +2,19 @@
 Functions for determining information about a referenced work.
 """
 
-from refkit.lookup   import arxiv
-from refkit.lookup   import crossref
-from refkit.metadata import Metadata
+import copy
+from functools          import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from refkit.lookup      import arxiv
+from refkit.lookup      import crossref
+from refkit.metadata    import Metadata
+from refkit.util        import arxivid
 
 from refkit.util.doi import extract
 
+# Maximum number of results to keep for each of the arXiv.org and CrossRef.org searches
+_maxCacheSize = 1024
+
 def getMetadata(input, autoSaveMinimum = crossref.defAutoSaveMinimum, autoSaveMaximum = crossref.defAutoSaveMaximum):
     """
     Gather metadata for a reference. In some cases it may be possible that multiple Metadata objects are returned.
@@ -24,7 +31,10 @@ def getMetadata(input, autoSaveMinimum = crossref.defAutoSaveMinimum, autoSaveMa
 
 def _getMetadataByLookup(input, autoSaveMinimum, autoSaveMaximum):
     """
-    Gather metadata for a reference by searching for information on lookup services.
+    Gather metadata for a reference by searching for information on lookup services. If the input string contains
+    both an arXiv identifier and a DOI, CrossRef.org is searched with the DOI at the same time as arXiv.org is
+    searched, since a DOI search never asks the user to pick a result. Otherwise only one of the searches waits on the
+    network, so they run one after the other on the calling thread, as do all searches that may prompt the user.
     
     :param input: String with the reference to extract metadata for
     :param autoSaveMinimum: Minimum value for overlap score to be valid without user intervention (0 - 1)
@@ -32,10 +42,32 @@ def _getMetadataByLookup(input, autoSaveMinimum, autoSaveMaximum):
                             user intervention (0 - 1)
     :returns: List of Metadata objects with the metadata that was gathered
     """
-    res  = _getMetadataFromArxiv(input)
-    res += _getMetadataFromCrossref(input, res, autoSaveMinimum, autoSaveMaximum)
+    if not _containsArxivIdAndDoi(input):
+        res  = _getMetadataFromArxiv(input)
+        res += _getMetadataFromCrossref(input, res, autoSaveMinimum, autoSaveMaximum)
+        return res
+    with ThreadPoolExecutor(max_workers = 2) as executor:
+        arxivFuture    = executor.submit(_getMetadataFromArxiv, input)
+        crossrefFuture = executor.submit(_searchCrossref, input, autoSaveMinimum, autoSaveMaximum)
+        res         = arxivFuture.result()
+        crossrefRes = crossrefFuture.result()
+    res += _getMetadataFromCrossref(input, res, autoSaveMinimum, autoSaveMaximum, crossrefRes)
     return res
 
+def _containsArxivIdAndDoi(input):
+    """
+    Check whether a string contains both an arXiv identifier and a DOI.
+    
+    :param input: String to check
+    :returns: True if input contains an arXiv identifier and a DOI. False otherwise
+    """
+    try:
+        arxivid.extract(input)
+        extract(input)
+        return True
+    except ValueError:
+        return False
+
 def _getMetadataFromArxiv(input):
     """
     Gather metadata for a reference from arXiv.org.
@@ -44,11 +76,26 @@ def _getMetadataFromArxiv(input):
     :returns: Metadata object with the information that was gathered
     """
     try:
-        return [ arxiv.search(input) ]
+        return [ copy.deepcopy(_searchArxivCached(input)) ]
+    except Exception:
+        return []
+
+def _searchCrossref(input, autoSaveMinimum, autoSaveMaximum):
+    """
+    Gather metadata for a reference from CrossRef.org using the input string.
+    
+    :param input: String with the reference to extract metadata for
+    :param autoSaveMinimum: Minimum value for overlap score to be valid without user intervention (0 - 1)
+    :param autoSaveMaximum: Maximum ratio of the second best to best overlaps for a result to be valid without
+                            user intervention (0 - 1)
+    :returns: Metadata object with the information that was gathered
+    """
+    try:
+        return [ copy.deepcopy(_searchCrossrefCached(input, autoSaveMinimum, autoSaveMaximum)) ]
     except Exception:
         return []
 
-def _getMetadataFromCrossref(input, existingMetadata, autoSaveMinimum, autoSaveMaximum):
+def _getMetadataFromCrossref(input, existingMetadata, autoSaveMinimum, autoSaveMaximum, inputMetadata = None):
     """
     Gather metadata for a reference from CrossRef.org. This function first tries to use metadata already gathered to
     search CrossRef.org, then uses the input string if metadata did not produce a result.
@@ -58,19 +105,19 @@ def _getMetadataFromCrossref(input, existingMetadata, autoSaveMinimum, autoSaveM
     :param autoSaveMinimum: Minimum value for overlap score to be valid without user intervention (0 - 1)
     :param autoSaveMaximum: Maximum ratio of the second best to best overlaps for a result to be valid without
                             user intervention (0 - 1)
+    :param inputMetadata: Result of searching CrossRef.org with the input string if that was already done, otherwise
+                          None
     :returns: Metadata object with the information that was gathered
     """
     for i in existingMetadata:
         try:
-            return [ crossref.search(i.toUnformattedString(), autoSaveMinimum, autoSaveMaximum) ]
-        except Exception, e:
+            return [ copy.deepcopy(_searchCrossrefCached(i.toUnformattedString(), autoSaveMinimum, autoSaveMaximum)) ]
+        except Exception as e:
             pass
     if len(existingMetadata) == 0:
-        try:
-            return [ crossref.search(input, autoSaveMinimum, autoSaveMaximum) ]
-        except:
-            pass
-        return _promptForManualEntry(input)
+        if inputMetadata is None:
+            inputMetadata = _searchCrossref(input, autoSaveMinimum, autoSaveMaximum)
+        return inputMetadata if inputMetadata else _promptForManualEntry(input)
     return []
 
 def _promptForManualEntry(input):
@@ -80,8 +127,8 @@ def _promptForManualEntry(input):
     :param input: String with the reference data being searched for.
     :returns: Metadata object with the information that was gathered or emtpy array.
     """
-    print ''
-    print 'LOOKUP STRING: ' + input
+    print('')
+    print('LOOKUP STRING: ' + input)
     return [] if _getResponse('Do you want to manually set the information [y/n]: ') == 'n' else _getDataFromUser()
 
 def _getDataFromUser():
@@ -90,15 +137,26 @@ def _getDataFromUser():
     
     :returns: Metadata object with the information that was gathered or emtpy array.
     """
-    print ''
-    input = raw_input('Better lookup string: ')
+    print('')
+    lookup = input('Better lookup string: ')
     res = []
-    if len(input) > 0:
-        res = _getMetadataByLookup(input, crossref.defAutoSaveMinimum, crossref.defAutoSaveMaximum)
+    if len(lookup) > 0:
+        res = _getMetadataByLookup(lookup, crossref.defAutoSaveMinimum, crossref.defAutoSaveMaximum)
     if len(res) == 0:
-        res = [ Metadata().getDataFromUser() ]
+        res = [ Metadata().getDataFromUser(_searchDoi) ]
     return res
 
+def _searchDoi(value):
+    """
+    Gather metadata for a DOI entered by the user from CrossRef.org. Only the DOI itself is looked up, so text that
+    is not a DOI is never sent to the CrossRef.org search api.
+    
+    :param value: String with the DOI to look up
+    :raises ValueError: If value does not contain a DOI or the DOI could not be found on CrossRef.org
+    :returns: Metadata object with the information that was gathered
+    """
+    return crossref.searchDoi(value)
+
 def _getResponse(message):
     """
     Get a y/n response from the user.
@@ -108,5 +166,30 @@ def _getResponse(message):
     """
     res = ''
     while res != 'y' and res != 'n':
-        res = raw_input(message)
+        res = input(message)
     return res
+
+@lru_cache(maxsize = _maxCacheSize)
+def _searchArxivCached(input):
+    """
+    Search arXiv.org, saving results so that repeated lookups of the same string do not query arXiv.org again. Results
+    are shared between calls, so they should be copied before they are returned to the caller.
+    
+    :param input: String with the reference to extract metadata for
+    :returns: Metadata object with the information that was gathered
+    """
+    return arxiv.search(input)
+
+@lru_cache(maxsize = _maxCacheSize)
+def _searchCrossrefCached(input, autoSaveMinimum, autoSaveMaximum):
+    """
+    Search CrossRef.org, saving results so that repeated lookups of the same string do not query CrossRef.org or ask
+    the user again. Results are shared between calls, so they should be copied before they are returned to the caller.
+    
+    :param input: String with the reference to extract metadata for
+    :param autoSaveMinimum: Minimum value for overlap score to be valid without user intervention (0 - 1)
+    :param autoSaveMaximum: Maximum ratio of the second best to best overlaps for a result to be valid without
+                            user intervention (0 - 1)
+    :returns: Metadata object with the information that was gathered
+    """
+    return crossref.search(input, autoSaveMinimum, autoSaveMaximum)
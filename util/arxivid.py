@@ -3,98 +3,60 @@ Functions for working with arXiv identifier strings.
 """
 
 import re
-from sets import Set
+import sys
 
 def extract(value):
     """
-    Attempt to extract an arXiv identifier from a string.
+    Attempt to extract an arXiv identifier from a string. Both formats of identifier are found in a single scan of
+    the string. A new format identifier is returned if there is one, otherwise the first old format identifier with
+    a known subject area is returned.
     
     :param value: String to extract arXiv identifier from
     :raises ValueError: If value does not contain an arXiv identifier
     :returns: String with the arXiv identifier that was extracted
     """
-    res = _extractNewFormat(value)
-    if res is None:
-        res = _extractOldFormat(value)
+    res = _find(value)
     if res is None:
         raise ValueError('arXiv identifier could not be extracted from string')
     return res
 
-def _extractNewFormat(value):
-    """
-    Attempt to extract a new format arXiv identifier from a string.
-    
-    :param value: String to extract arXiv identifier from
-    :returns: String with the arXiv identifier that was extracted
-    :returns: None if an arXiv identifier was not found
-    """
-    matches = _newPattern.finditer(value)
-    for i in matches:
-        if _validateStartOfFormat(value, i) and _validateEndOfFormat(value, i):
-            return i.group('id')
-    return None
-
-def _validateStartOfFormat(value, match):
+def extractMany(values):
     """
-    Make sure that characters preceding a matched arXiv identifier do not invalidate the match. The match is
-    considered invalid if it is preceded by any alphanumeric character.
+    Attempt to extract an arXiv identifier from each of several strings. Strings without an identifier do not raise
+    an error, so this is faster than calling extract() on each string when many of them do not contain one.
     
-    :param value: String that was being searched
-    :param match: MatchObject returned from regular expression function
-    :returns: True if characters before match are valid
-    :returns: False if characters before match are not valid
+    :param values: List of strings to extract arXiv identifiers from
+    :returns: List with the arXiv identifier extracted from each string, in the same order as values, or None for each
+              string that does not contain an arXiv identifier
     """
-    if match.start() > 0:
-        preString = value[match.start()-1:match.start()]
-        if re.match('\w', preString) is not None:
-            return False
-    return True
+    return [ _find(i) for i in values ]
 
-def _validateEndOfFormat(value, match):
+def _find(value):
     """
-    Make sure that characters following a matched arXiv identifier do not invalidate the match. The match is
-    considered invalid if it is followed by any alphanumeric character, unless that matches the pattern vI where
-    I is an integer.
-    
-    :param value: String that was being searched
-    :param match: MatchObject returned from regular expression function
-    :returns: True if characters after match are valid
-    :returns: False if characters after match are not valid
-    """
-    if match.end() < len(value):
-        postString = value[match.end():]
-        if re.match('\w', postString) is not None and re.match('[vV][0-9]', postString) is None:
-            return False
-    return True
-
-def _extractOldFormat(value):
-    """
-    Attempt to extract an old format arXiv identifier from a string.
+    Find the arXiv identifier in a string. See extract() for the identifier that is chosen.
     
     :param value: String to extract arXiv identifier from
-    :returns: String with the arXiv identifier that was extracted
-    :returns: None if an arXiv identifier was not found
+    :returns: String with the arXiv identifier that was extracted or None if an arXiv identifier was not found
     """
-    try:
-        match = _oldPattern.search(value)
-        if match is not None:
-            id = match.group('id')
-            if id.split('/')[0] in _subjects and _validateEndOfFormat(value, match):
-                return id
-        return None
-    except:
-        raise
-
-# Regular expression to match new format of arXiv identifier
-# This finds strings of the form IIII.IIII (where I are all integers) and saves the matching string as 'id'
-_newPattern = re.compile('(?P<id>[0-9]{4}\.[0-9]{4})')
+    res = None
+    for i in _pattern.finditer(value):
+        if i.group('new') is not None:
+            return i.group('new')
+        if res is None:
+            old = i.group('old')
+            if old[:old.find('/')] in _subjects:
+                res = old
+    return res
 
-# Regular expression to match old format of arXiv identifier
-# This find strings of the form [letters]letters/numbers where numbers is of length 7
-_oldPattern = re.compile('(?P<id>[a-zA-Z][a-zA-Z\-\.]+/[0-9]{7})')
+# Regular expression to match either format of arXiv identifier
+# The new format is of the form IIII.IIII (where I are all integers) and is saved as 'new'. The old format is of the
+# form [letters]letters/numbers where numbers is of length 7 and is saved as 'old'. Matches that are preceded by an
+# alphanumeric character, or followed by one unless it starts a version number of the form vI, are skipped.
+_pattern = re.compile(r'(?<!\w)(?:(?P<new>[0-9]{4}\.[0-9]{4})|(?P<old>[a-zA-Z][a-zA-Z\-\.]+/[0-9]{7}))' \
+                      r'(?!(?![vV][0-9])\w)', re.ASCII)
 
-# List of arxiv subject areas
-_subjects = Set([\
+# Set of arxiv subject areas. The names are interned since they are only used for membership tests.
+_subjects = frozenset(map(sys.intern, (\
     'stat', 'stat.AP', 'stat.CO', 'stat.ML', 'stat.ME', 'stat.TH', 'q-bio', 'q-bio.BM', 'q-bio.CB', 'q-bio.GN', \
     'q-bio.MN', 'q-bio.NC', 'q-bio.OT', 'q-bio.PE', 'q-bio.QM', 'q-bio.SC', 'q-bio.TO', 'cs', 'cs.AR', 'cs.AI', \
     'cs.CL', 'cs.CC', 'cs.CE', 'cs.CG', 'cs.GT', 'cs.CV', 'cs.CY', 'cs.CR', 'cs.DS', 'cs.DB', 'cs.DL', 'cs.DM', \
@@ -110,4 +72,4 @@ _subjects = Set([\
     'physics.atm-clus', 'physics.bio-ph', 'physics.chem-ph', 'physics.class-ph', 'physics.comp-ph', \
     'physics.data-an', 'physics.flu-dyn', 'physics.gen-ph', 'physics.geo-ph', 'physics.hist-ph', 'physics.ins-det', \
     'physics.med-ph', 'physics.optics', 'physics.ed-ph', 'physics.soc-ph', 'physics.plasm-ph', 'physics.pop-ph', \
-    'physics.space-ph', 'quant-ph'])
+    'physics.space-ph', 'quant-ph')))
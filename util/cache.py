@@ -0,0 +1,62 @@
+"""
+Functions for caching the responses of api calls on disk so that they do not have to be requested again.
+"""
+
+import os
+import shelve
+import threading
+
+# Directory where the cache files are stored
+cacheDir = os.path.join(os.path.expanduser('~'), '.refkit')
+
+# Lock held while a cache file is open since shelve does not support concurrent access
+_lock = threading.Lock()
+
+def load(name, key):
+    """
+    Load a value from a cache.
+    
+    :param name: Name of the cache to load the value from
+    :param key: Key of the value to load
+    :raises KeyError: If the value is not in the cache or the cache could not be read
+    :returns: Value that was saved in the cache
+    """
+    with _lock:
+        try:
+            cache = shelve.open(os.path.join(cacheDir, name), 'r')
+            try:
+                return cache[_formatKey(key)]
+            finally:
+                cache.close()
+        except Exception:
+            raise KeyError(key)
+
+def save(name, key, value):
+    """
+    Save a value in a cache. Failures to write to the cache are ignored since the cache is only used to avoid
+    repeating api calls.
+    
+    :param name: Name of the cache to save the value in
+    :param key: Key to save the value under
+    :param value: Value to save
+    """
+    with _lock:
+        try:
+            if not os.path.isdir(cacheDir):
+                os.makedirs(cacheDir)
+            cache = shelve.open(os.path.join(cacheDir, name), 'c')
+            try:
+                cache[_formatKey(key)] = value
+            finally:
+                cache.close()
+        except Exception:
+            pass
+
+def _formatKey(key):
+    """
+    Convert a key to the form used to store it in a cache. Keys are case insensitive.
+    
+    :param key: Key to convert
+    :returns: Lowercase version of the key
+    """
+    return key.lower()
@@ -2,10 +2,28 @@
 Functions for working with full citation strings.
 """
 
-import re
+from functools import lru_cache
 
-# Regular expression to find all non alphanumeric characters
-_subRegex = re.compile('\W')
+class _NonWordTable(dict):
+    """
+    Translation table for str.translate that maps each character that is not alphanumeric or an underscore to a
+    space. Characters are looked up the first time they are seen and saved in the table after that.
+    """
+    
+    def __missing__(self, key):
+        """
+        Get the replacement for a character that is not yet in the table.
+        
+        :param key: Unicode code point of the character
+        :returns: The character itself if it is alphanumeric or an underscore, otherwise a space
+        """
+        character = chr(key)
+        res = character if character.isalnum() or character == '_' else ' '
+        self[key] = res
+        return res
+
+# Table to replace all non alphanumeric characters with spaces
+_nonWordTable = _NonWordTable()
 
 def overlap(lookup, citation):
     """
@@ -16,7 +34,28 @@ def overlap(lookup, citation):
     :param citation: Full citation string
     :returns: Ratio of the number of words from lookup found in citation to the number of words in lookup
     """
-    wordsInLookup   = _subRegex.sub(' ', lookup  ).lower().split()
-    wordsInCitation = _subRegex.sub(' ', citation).lower().split()
-    matches = [ 1 if i in wordsInCitation else 0 for i in wordsInLookup ]
-    return float(sum(matches)) / len(wordsInLookup)
+    wordsInLookup   = _getWords(lookup)
+    wordsInCitation = _getWordSet(citation)
+    matches = sum(1 for i in wordsInLookup if i in wordsInCitation)
+    return matches / len(wordsInLookup)
+
+@lru_cache(maxsize = 4096)
+def _getWords(value):
+    """
+    Break a string into lowercase words. Results are cached since the same lookup is usually compared against many
+    citations.
+    
+    :param value: String to break into words
+    :returns: Tuple with the words in value, in order and including repeated words
+    """
+    return tuple(value.translate(_nonWordTable).lower().split())
+
+@lru_cache(maxsize = 4096)
+def _getWordSet(value):
+    """
+    Get the set of distinct lowercase words in a string. Results are cached in the same way as _getWords().
+    
+    :param value: String to break into words
+    :returns: Frozenset with the words in value
+    """
+    return frozenset(_getWords(value))
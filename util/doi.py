@@ -12,30 +12,40 @@ def extract(value):
     :raises ValueError: If value does not contain a DOI
     :returns: String with the DOI that was extracted
     """
-    matches = _doiRegex.finditer(value)
-    for i in matches:
-        if _validateStart(value, i):
-            return i.group('doi').rstrip('-./')
-    raise ValueError('DOI could not be extracted from string')
+    res = _find(value)
+    if res is None:
+        raise ValueError('DOI could not be extracted from string')
+    return res
 
-def _validateStart(value, match):
+def extractMany(values):
     """
-    Make sure that the characters preceding a DOI number do not invalidate the match. The match is considered to
-    be invalid if it is preceded by any alphanumeric character.
+    Attempt to extract a DOI from each of several strings. Strings without a DOI do not raise an error, so this is
+    faster than calling extract() on each string when many of them do not contain one.
     
-    :param value: String that was being searched
-    :param match: MatchObject returned from regular expression function
-    :returns: True if characters before match are valid
-    :returns: False if characters before match are not valid
+    :param values: List of strings to extract DOIs from
+    :returns: List with the DOI extracted from each string, in the same order as values, or None for each string
+              that does not contain a DOI
     """
-    if match.start() > 0:
-        preString = value[match.start()-1:match.start()]
-        if re.match('\w', preString) is not None:
-            return False
-    return True
+    return [ _find(i) for i in values ]
+
+def _find(value):
+    """
+    Find a DOI in a string. Every DOI starts with '10.', so that prefix is found with a plain string search first and
+    the regular expression is only run from there.
+    
+    :param value: String to extract DOI from
+    :returns: String with the DOI that was extracted or None if a DOI was not found
+    """
+    start = value.find('10.')
+    if start < 0:
+        return None
+    match = _doiRegex.search(value, start)
+    return match.group('doi').rstrip('-./') if match is not None else None
 
 # Regular expression for matching a DOI
 # This looks for patterns starting with '10.', followed by a series of integers and periods, followed by a backslash,
 # followed by a series of alphanumeric values, backslashes, periods, parentheses, and hyphens. The matching string is
-# saved in a group named 'doi'.
-_doiRegex = re.compile('(?P<doi>10\.[0-9\.]+/\S+)(?!\w)')
+# saved in a group named 'doi'. Matches that are preceded or followed by an alphanumeric character are skipped. The
+# run of non-space characters is left unbounded: it always ends at a space or the end of the string, which passes the
+# check that follows, so it is scanned once without backtracking. A bounded repeat is slower on long runs.
+_doiRegex = re.compile(r'(?<!\w)(?P<doi>10\.[0-9\.]+/\S+)(?!\w)', re.ASCII)
@@ -4,6 +4,12 @@ Functions for working with ISBN strings.
 
 import re
 
+# Digits that can appear in an ISBN
+_digits = '0123456789'
+
+# Smallest number of digits in an ISBN
+_minDigits = 10
+
 def extract(value):
     """
     Attempt to extract an ISBN from a string by checking for common formatting types.
@@ -12,44 +18,36 @@ def extract(value):
     :raises ValueError: If value does not contain a ISBN
     :returns: String with the ISBN that was extracted
     """
-    value = value.replace('-', '')
-    matches = _isbnRegex.finditer(value)
-    for i in matches:
-        if _validateStart(value, i) and _validateEnd(value, i):
-            return i.group('id')
-    raise ValueError('ISBN could not be extracted from string')
+    res = _find(value)
+    if res is None:
+        raise ValueError('ISBN could not be extracted from string')
+    return res
 
-def _validateStart(value, match):
+def extractMany(values):
     """
-    Make sure that the characters preceding an ISBN number do not invalidate the match. The match is considered to
-    be invalid if it is preceded by any alphanumeric character.
+    Attempt to extract an ISBN from each of several strings. Strings without an ISBN do not raise an error, so this is
+    faster than calling extract() on each string when many of them do not contain one.
     
-    :param value: String that was being searched
-    :param match: MatchObject returned from regular expression function
-    :returns: True if characters before match are valid
-    :returns: False if characters before match are not valid
+    :param values: List of strings to extract ISBNs from
+    :returns: List with the ISBN extracted from each string, in the same order as values, or None for each string
+              that does not contain an ISBN
     """
-    if match.start() > 0:
-        preString = value[match.start()-1:match.start()]
-        if re.match('\w', preString) is not None:
-            return False
-    return True
+    return [ _find(i) for i in values ]
 
-def _validateEnd(value, match):
+def _find(value):
     """
-    Make sure that the characters preceding an ISBN number do not invalidate the match. The match is considered to
-    be invalid if it is followed by any alphanumeric character.
+    Find an ISBN in a string. Strings with too few digits to hold an ISBN are rejected before the regular expression
+    is run, since counting digits is much faster than searching for a match.
     
-    :param value: String that was being searched
-    :param match: MatchObject returned from regular expression function
-    :returns: True if characters before match are valid
-    :returns: False if characters before match are not valid
+    :param value: String to extract ISBN from
+    :returns: String with the ISBN that was extracted or None if an ISBN was not found
     """
-    if match.end() < len(value):
-        postString = value[match.end():match.end()+1]
-        if re.match('\w', postString) is not None:
-            return False
-    return True
+    if sum(map(value.count, _digits)) < _minDigits:
+        return None
+    match = _isbnRegex.search(value)
+    return match.group('id').replace('-', '') if match is not None else None
 
-# Regular expression for case-insensitive match to 'isbn:'
-_isbnRegex = re.compile('(?P<id>[0-9]{13}|[0-9]{10})')
+# Regular expression for matching a 10 or 13 digit ISBN that is not preceded or followed by an alphanumeric character
+# The digits may be separated by any number of hyphens, which are ignored along with hyphens before and after the ISBN
+# when checking the characters around it. The matching string, including hyphens, is saved in a group named 'id'.
+_isbnRegex = re.compile(r'(?<![\w\-])\-*(?P<id>[0-9](?:\-*[0-9]){12}|[0-9](?:\-*[0-9]){9})(?!\-*\w)', re.ASCII)
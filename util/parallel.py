@@ -0,0 +1,35 @@
+"""
+Functions for running calls that wait on the network in parallel.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+def run(function, values, maxWorkers):
+    """
+    Call a function with each item in a list of values using a pool of threads. This is meant for functions that
+    spend most of their time waiting on a remote api, such as the lookup search functions.
+    
+    :param function: Function to call with each value
+    :param values: List of values to call the function with
+    :param maxWorkers: Maximum number of calls to run at the same time
+    :returns: List with the result of the function for each value, in the same order as values. The result is None
+              for any value where the function raised an exception.
+    """
+    values = list(values)
+    if len(values) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers = min(maxWorkers, len(values))) as executor:
+        return list(executor.map(lambda i: _callOrNone(function, i), values))
+
+def _callOrNone(function, value):
+    """
+    Call a function, returning None instead of raising if it fails.
+    
+    :param function: Function to call
+    :param value: Value to call the function with
+    :returns: Result of the function or None if it raised an exception
+    """
+    try:
+        return function(value)
+    except Exception:
+        return None